@@ -1,4 +1,17 @@
-from typing import TypeVar, MutableSequence, Optional, List, Union, overload, Any
+from typing import (
+    TypeVar,
+    MutableSequence,
+    Optional,
+    List,
+    Union,
+    overload,
+    Any,
+    Callable,
+    Dict,
+    Tuple,
+    Iterable,
+    Type,
+)
 
 from pydantic import BaseModel, ConfigDict
 
@@ -7,6 +20,8 @@ __version__: str
 
 class CollectionModelConfig(ConfigDict):
     validate_assignment_strict: bool
+    track_changes: bool
+    maxlen: Optional[int]
 
 T = TypeVar('T')
 
@@ -15,6 +30,23 @@ class BaseCollectionModel(MutableSequence[T], BaseModel):
     def insert(self, index: int, value: Union[T, dict]) -> None: ...
     def append(self, value: Union[T, dict]) -> None: ...
     def sort(self, key: Any, reverse: bool = False): ...
+    def filter(self, predicate: Callable[[T], bool]) -> 'BaseCollectionModel[T]': ...
+    def where(self, **conditions: Any) -> 'BaseCollectionModel[T]': ...
+    def group_by(
+        self, key: Union[str, Callable[[T], Any]]
+    ) -> Dict[Any, 'BaseCollectionModel[T]']: ...
+    def pluck(self, field: str) -> List[Any]: ...
+    def partition(
+        self, predicate: Callable[[T], bool]
+    ) -> Tuple['BaseCollectionModel[T]', 'BaseCollectionModel[T]']: ...
+    def by_type(self, tp: Type[Any]) -> 'BaseCollectionModel[T]': ...
+    def pop_changes(self) -> List[Dict[str, Any]]: ...
+    def diff(
+        self,
+        other: Iterable[T],
+        key: Union[str, Callable[[T], Any], None] = None,
+    ) -> List[Dict[str, Any]]: ...
+    def apply_patch(self, patch: List[Dict[str, Any]]) -> None: ...
     @overload
     def __getitem__(self, index: int) -> T: ...
     @overload
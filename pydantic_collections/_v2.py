@@ -1,6 +1,10 @@
+import bisect
 import functools
+import heapq
+import operator
 import types
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from typing import (
     List,
     TYPE_CHECKING,
@@ -10,24 +14,54 @@ from typing import (
     Dict,
     TypeVar,
     MutableSequence,
+    Callable,
+    Optional,
+    FrozenSet,
 )
 
-from pydantic import RootModel, TypeAdapter, ConfigDict, ValidationError
+from pydantic import (
+    BaseModel,
+    RootModel,
+    TypeAdapter,
+    ConfigDict,
+    ValidationError,
+    PrivateAttr,
+    AfterValidator,
+    WrapSerializer,
+)
 from pydantic_core import PydanticUndefined, ErrorDetails
-from typing_extensions import get_origin, get_args
+from typing_extensions import get_origin, get_args, Annotated
 
 UnionType = getattr(types, 'UnionType', Union)
 
 
-def get_types_from_annotation(tp: Any):
+def is_union(tp: Any) -> bool:
     origin = get_origin(tp)
-    if origin is Union or origin is UnionType:
+    return origin is Union or origin is UnionType
+
+
+def get_union_members(tp: Any):
+    # annotated union (e.g. with discriminator) is unwrapped,
+    # other annotated members are kept as is to preserve their constraints
+    if get_origin(tp) is Annotated and is_union(get_args(tp)[0]):
+        tp = get_args(tp)[0]
+
+    if is_union(tp):
         for sub_tp in get_args(tp):
-            yield from get_types_from_annotation(sub_tp)
-    elif isinstance(tp, type):
-        yield tp
+            yield from get_union_members(sub_tp)
     else:
-        yield origin
+        yield tp
+
+
+def get_types_from_annotation(tp: Any):
+    for member in get_union_members(tp):
+        if get_origin(member) is Annotated:
+            member = get_args(member)[0]
+
+        if isinstance(member, type):
+            yield member
+        else:
+            yield get_origin(member)
 
 
 def wrap_errors_with_loc(
@@ -55,14 +89,370 @@ def tp_cache(func):
     return inner
 
 
+@functools.lru_cache(maxsize=None)
+def cached_attrgetter(*names: str) -> Callable[[Any], Any]:
+    """Returns operator.attrgetter for the given field names, reusing
+    previously built getters.
+    """
+    return operator.attrgetter(*names)
+
+
+# Classes created by __class_getitem__ by the origin class and the element
+# type repr. Element types that compare by identity (e.g. Annotated with
+# Field) are new objects after unpickling and would miss tp_cache.
+collection_classes: Dict[Tuple[type, str], type] = {}
+
+
+def restore_collection(cls_ref, data: Optional[list], columns: Optional[tuple] = None):
+    """Unpickles a collection pickled by BaseCollectionModel.__reduce__"""
+    if columns is not None:
+        data = load_model_columns(*columns)
+    if isinstance(cls_ref, tuple):
+        origin, el_type = cls_ref
+        key = (origin, repr(el_type))
+        cls_ref = collection_classes.get(key)
+        if cls_ref is None:
+            cls_ref = collection_classes[key] = origin[el_type]
+    return cls_ref._from_trusted(data)
+
+
+def dump_model_columns(items: list) -> Optional[tuple]:
+    """Returns field values of models of the same class as column lists,
+    so a collection of models is pickled as a few lists instead of
+    one object per model. None is returned if the models have state
+    not held by their fields (extra fields, private attributes).
+    """
+    if not items or not isinstance(items[0], BaseModel):
+        return None
+
+    model_cls = items[0].__class__
+    names = tuple(model_cls.model_fields)
+    if not names:
+        return None
+
+    keys = set(names)
+    states = []
+    fields_sets = {}
+    for i, el in enumerate(items):
+        if (
+            el.__class__ is not model_cls
+            or el.__pydantic_extra__ is not None
+            or el.__pydantic_private__ is not None
+            or el.__dict__.keys() != keys
+        ):
+            return None
+        # usually all fields are set, so only the exceptions are kept
+        if el.__pydantic_fields_set__ != keys:
+            fields_sets[i] = el.__pydantic_fields_set__
+        states.append(el.__dict__)
+
+    columns = [[state[name] for state in states] for name in names]
+    return model_cls, names, columns, fields_sets
+
+
+def load_model_columns(model_cls: type, names: tuple, columns: list, fields_sets: dict) -> list:
+    """Restores models dumped by dump_model_columns without validation"""
+    keys = set(names)
+    new = model_cls.__new__
+    set_attr = object.__setattr__
+    items = []
+    for i, values in enumerate(zip(*columns)):
+        el = new(model_cls)
+        set_attr(el, '__dict__', dict(zip(names, values)))
+        set_attr(el, '__pydantic_fields_set__', set(fields_sets.get(i, keys)))
+        set_attr(el, '__pydantic_extra__', None)
+        set_attr(el, '__pydantic_private__', None)
+        items.append(el)
+    return items
+
+
+def longest_increasing_pairs(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Returns the longest subsequence of (i, j) pairs sorted by j
+    in which i increases too (patience sorting, O(n log n)).
+    """
+    tails = []  # the smallest last i of increasing subsequences by length
+    tail_pairs = []
+    previous = []
+    for n, (i, _) in enumerate(pairs):
+        k = bisect.bisect_left(tails, i)
+        if k == len(tails):
+            tails.append(i)
+            tail_pairs.append(n)
+        else:
+            tails[k] = i
+            tail_pairs[k] = n
+        previous.append(tail_pairs[k - 1] if k else -1)
+
+    result = []
+    n = tail_pairs[-1] if tail_pairs else -1
+    while n >= 0:
+        result.append(pairs[n])
+        n = previous[n]
+    return result[::-1]
+
+
+def shortest_edit_matches(
+    old: list, new: list, i1: int, i2: int, j1: int, j2: int, max_edits: int
+) -> Tuple[List[Tuple[int, int]], int, int]:
+    """Returns matched positions of the shortest edit script of
+    old[i1:i2] and new[j1:j2] (Myers O(ND) diff) and the end positions.
+    If the script takes more than max_edits insertions and deletions,
+    the matches lead to the furthest positions reached instead.
+    """
+    n, m = i2 - i1, j2 - j1
+    offset = max_edits + 1
+    v = [0] * (2 * max_edits + 3)
+    trace = []
+    end = None
+    for d in range(max_edits + 1):
+        trace.append(v[:])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and old[i1 + x] == new[j1 + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                end = (n, m)
+                break
+        if end is not None:
+            break
+    else:
+        end = max(
+            ((v[offset + k], v[offset + k] - k) for k in range(-d, d + 1, 2)),
+            key=lambda p: sum(p) if p[0] <= n and p[1] <= m else -1,
+        )
+
+    # walks the edit script back, diagonal moves are matches
+    matches = []
+    x, y = end
+    for d in range(len(trace) - 1, 0, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+            k += 1
+        else:
+            k -= 1
+        prev_x = v[offset + k]
+        prev_y = prev_x - k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((i1 + x, j1 + y))
+        x, y = prev_x, prev_y
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        matches.append((i1 + x, j1 + y))
+    return matches, i1 + end[0], j1 + end[1]
+
+
+def match_keys(old: list, new: list) -> List[Tuple[int, int]]:
+    """Returns sorted (old, new) positions of equal keys forming a common
+    subsequence. Like patience diff, keys occurring once on both sides are
+    matched first and the segments between them are matched the same way.
+    Segments without such keys are matched by the shortest edit script
+    found for a limited number of edits at a time to keep the time near-linear.
+    """
+    matches = []
+    segments = [(0, len(old), 0, len(new))]
+    while segments:
+        i1, i2, j1, j2 = segments.pop()
+        while i1 < i2 and j1 < j2 and old[i1] == new[j1]:
+            matches.append((i1, j1))
+            i1 += 1
+            j1 += 1
+        while i1 < i2 and j1 < j2 and old[i2 - 1] == new[j2 - 1]:
+            i2 -= 1
+            j2 -= 1
+            matches.append((i2, j2))
+        if i1 == i2 or j1 == j2:
+            continue
+
+        positions = {}
+        for i in range(i1, i2):
+            positions.setdefault(old[i], []).append(i)
+        counts = {}
+        for j in range(j1, j2):
+            counts[new[j]] = counts.get(new[j], 0) + 1
+
+        pairs = [
+            (positions[k][0], j)
+            for j, k in enumerate(new[j1:j2], j1)
+            if counts[k] == 1 and len(positions.get(k, ())) == 1
+        ]
+        if not pairs:
+            if not any(k in positions for k in new[j1:j2]):
+                continue
+
+            # e.g. a few distinct keys repeated many times, matched 64 edits at a time
+            while i1 < i2 or j1 < j2:
+                edit_matches, i1, j1 = shortest_edit_matches(old, new, i1, i2, j1, j2, 64)
+                matches.extend(edit_matches)
+            continue
+
+        for i, j in longest_increasing_pairs(pairs):
+            segments.append((i1, i, j1, j))
+            matches.append((i, j))
+            i1, j1 = i + 1, j + 1
+        segments.append((i1, i2, j1, j2))
+
+    matches.sort()
+    return matches
+
+
+def parse_patch_index(op: str, path: str, size: int) -> int:
+    """Converts JSON Patch path (e.g. "/0" or "/-") to the list index"""
+    if op == 'add' and path == '/-':
+        return size
+
+    index = path[1:]
+    if not path.startswith('/') or not index.isdigit():
+        raise ValueError('Unsupported patch path: {!r}'.format(path))
+
+    index = int(index)
+    if index > size or (index == size and op != 'add'):
+        raise IndexError('Patch path out of range: {!r}'.format(path))
+
+    return index
+
+
+def bounded_root_annotation(el_type: Any, maxlen: int) -> Any:
+    """Returns root annotation of collections limited to maxlen elements.
+    Input is validated as a list and kept in a deque afterwards.
+    """
+
+    def validate(value: list) -> deque:
+        # like deque, only the last maxlen elements are kept
+        return deque(value, maxlen=maxlen)
+
+    def serialize(value: deque, handler):
+        return handler(list(value))
+
+    return Annotated[List[el_type], AfterValidator(validate), WrapSerializer(serialize)]
+
+
 class CollectionModelConfig(ConfigDict):
     validate_assignment_strict: bool
+    track_changes: bool
+    maxlen: Optional[int]
 
 
 @dataclass
 class Element:
     annotation: Any
     adapter: TypeAdapter
+    types: Tuple[type, ...] = ()
+    members: FrozenSet[type] = frozenset()
+    validators: Dict[type, TypeAdapter] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.types = tuple(get_types_from_annotation(self.annotation))
+        members = list(get_union_members(self.annotation))
+        if len(members) > 1:
+            # instances of union members that are plain classes
+            # can be validated without trying the whole union
+            self.members = frozenset(
+                member
+                for member in members
+                if isinstance(member, type) and self.types.count(member) == 1
+            )
+
+    def get_validator(self, tp: type) -> TypeAdapter:
+        validator = self.validators.get(tp)
+        if validator is None:
+            validator = TypeAdapter(tp) if tp in self.members else self.adapter
+            self.validators[tp] = validator
+        return validator
+
+
+@dataclass
+class TypeIndex:
+    """Sorted positions of collection elements by element type.
+
+    Positions are stored with an offset, so on insertion and removal
+    either the preceding or the following positions (whichever are fewer)
+    are shifted, e.g. evicting the first element shifts none of them.
+    Mutations are named after JSON Patch operations.
+    """
+
+    positions: Dict[type, List[int]]
+    size: int
+    offset: int = 0
+
+    @classmethod
+    def build(cls, items: list) -> 'TypeIndex':
+        positions = {}
+        for i, el in enumerate(items):
+            positions.setdefault(type(el), []).append(i)
+        return cls(positions, len(items))
+
+    def find(self, tp: type) -> List[int]:
+        """Returns sorted indices of elements that are instances of tp"""
+        indices = [v for k, v in self.positions.items() if issubclass(k, tp)]
+        if len(indices) == 1:
+            indices = indices[0]
+        else:
+            indices = heapq.merge(*indices)
+
+        offset = self.offset
+        return [i - offset for i in indices]
+
+    def _shift(self, position: int, delta: int, before: bool):
+        # shifts positions lower than the given one or the rest of them
+        for positions in self.positions.values():
+            k = bisect.bisect_left(positions, position)
+            if before:
+                positions[:k] = [p + delta for p in positions[:k]]
+            elif k < len(positions):
+                positions[k:] = [p + delta for p in positions[k:]]
+
+    def add(self, index: int, tp: type):
+        position = index + self.offset
+        if index == self.size:
+            pass
+        elif index < self.size - index:
+            self._shift(position, -1, before=True)
+            self.offset -= 1
+            position -= 1
+        else:
+            self._shift(position, 1, before=False)
+
+        positions = self.positions.setdefault(tp, [])
+        if not positions or positions[-1] < position:
+            positions.append(position)
+        else:
+            bisect.insort(positions, position)
+        self.size += 1
+
+    def remove(self, index: int, tp: type):
+        position = index + self.offset
+        positions = self.positions[tp]
+        del positions[bisect.bisect_left(positions, position)]
+        if not positions:
+            del self.positions[tp]
+
+        self.size -= 1
+        if index < self.size - index:
+            self._shift(position, 1, before=True)
+            self.offset += 1
+        else:
+            self._shift(position, -1, before=False)
+
+    def replace(self, index: int, old_tp: type, new_tp: type):
+        if old_tp is new_tp:
+            return
+
+        position = index + self.offset
+        positions = self.positions[old_tp]
+        del positions[bisect.bisect_left(positions, position)]
+        if not positions:
+            del self.positions[old_tp]
+        bisect.insort(self.positions.setdefault(new_tp, []), position)
 
 
 TElement = TypeVar("TElement")
@@ -76,8 +466,13 @@ class BaseCollectionModel(MutableSequence[TElement], RootModel[List[TElement]]):
     model_config = CollectionModelConfig(
         validate_assignment=True,
         validate_assignment_strict=True,
+        track_changes=False,
+        maxlen=None,
     )
 
+    _changes: Optional[List[Dict[str, Any]]] = PrivateAttr(default=None)
+    _type_index: Optional[TypeIndex] = PrivateAttr(default=None)
+
     @tp_cache
     def __class_getitem__(cls, el_type):
         if not issubclass(cls, BaseCollectionModel):
@@ -102,9 +497,43 @@ class BaseCollectionModel(MutableSequence[TElement], RootModel[List[TElement]]):
 
         super(BaseCollectionModel, self).__init__(root=root, **kwargs)
 
-    def _validate_element_type(self, value: Any, index: int):
-        tps = get_types_from_annotation(self.__element__.annotation)
-        if not isinstance(value, tuple(tps)):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # collections with maxlen keep their elements in a deque, the root
+        # annotation is replaced before pydantic collects the model fields
+        maxlen = cls.model_config.get('maxlen')
+        element = getattr(cls, '__element__', None)
+        if maxlen is not None and element is not None:
+            cls.__annotations__ = {
+                **cls.__dict__.get('__annotations__', {}),
+                'root': bounded_root_annotation(element.annotation, maxlen),
+            }
+
+    def __copy__(self):
+        # the type index and the change log can't be shared between copies
+        copied = super().__copy__()
+        copied._type_index = None
+        if self._changes is not None:
+            copied._changes = list(self._changes)
+        return copied
+
+    def _as_list(self) -> list:
+        # root of collections with maxlen is a deque
+        root = self.root
+        return root if root.__class__ is list else list(root)
+
+    def _set_root(self, data: list):
+        # root is updated in place, so the elements aren't validated again
+        if self.root.__class__ is list:
+            self.root[:] = data
+        else:
+            self.root.clear()
+            self.root.extend(data)
+
+    def _validate_element_type(self, value: Any, index: int) -> TypeAdapter:
+        element = self.__element__
+        tp = type(value)
+        if tp not in element.validators and not isinstance(value, element.types):
             error = {
                 'type': 'is_instance_of',
                 'loc': (index,),
@@ -116,17 +545,30 @@ class BaseCollectionModel(MutableSequence[TElement], RootModel[List[TElement]]):
                 line_errors=[error],
             )
 
+        return element.get_validator(tp)
+
     def _validate_element(self, value: Any, index: int):
         if not self.model_config['validate_assignment']:
             return value
 
-        strict = False
-        if self.model_config['validate_assignment_strict']:
-            self._validate_element_type(value, index)
-            strict = True
+        if not self.model_config['validate_assignment_strict']:
+            return self._adapt_element(value, index)
+
+        validator = self._validate_element_type(value, index)
+        return self._adapt_element(value, index, strict=True, validator=validator)
+
+    def _adapt_element(
+        self,
+        value: Any,
+        index: int,
+        strict: bool = False,
+        validator: Optional[TypeAdapter] = None,
+    ):
+        if validator is None:
+            validator = self.__element__.adapter
 
         try:
-            return self.__element__.adapter.validate_python(
+            return validator.validate_python(
                 value,
                 strict=strict,
                 from_attributes=True,
@@ -141,38 +583,317 @@ class BaseCollectionModel(MutableSequence[TElement], RootModel[List[TElement]]):
                 line_errors=errors,
             )
 
+    def _dump_element(self, value: Any):
+        return self.__element__.adapter.dump_python(value, mode='json')
+
+    def _make_change(self, op: str, index: Union[int, str], value: Any = PydanticUndefined):
+        change = {'op': op, 'path': '/{}'.format(index)}
+        if value is not PydanticUndefined:
+            change['value'] = self._dump_element(value)
+        return change
+
+    def _record_change(self, op: str, index: Union[int, str], value: Any = PydanticUndefined):
+        if not self.model_config['track_changes']:
+            return
+
+        if self._changes is None:
+            self._changes = []
+        self._changes.append(self._make_change(op, index, value))
+
+    def __eq__(self, other):
+        # private attributes hold change log and type index only,
+        # so just the classes and the elements are compared
+        if not isinstance(other, BaseCollectionModel):
+            return NotImplemented
+        self_type = self.__pydantic_generic_metadata__['origin'] or self.__class__
+        other_type = other.__pydantic_generic_metadata__['origin'] or other.__class__
+        return self_type is other_type and self.root == other.root
+
     def __len__(self):
         return len(self.root)
 
     def __getitem__(self, index):
         if isinstance(index, slice):
-            return self.__class__(self.root[index])
+            return self._from_trusted(self._as_list()[index])
         else:
             return self.root[index]
 
     def __setitem__(self, index, value):
-        self.root[index] = self._validate_element(value, index)
-        return self.root[index]
+        value = self._validate_element(value, index)
+        if isinstance(index, slice):
+            self._set_slice(index, value)
+            return value
+
+        if self._type_index is not None:
+            i = range(len(self.root))[index]
+            self._type_index.replace(i, type(self.root[i]), type(value))
+        self.root[index] = value
+        if self.model_config['track_changes']:
+            self._record_change('replace', range(len(self.root))[index], value)
+        return value
+
+    def _set_slice(self, index: slice, value):
+        value = list(value)
+        indices = range(len(self.root))[index]
+        if indices.step == 1:
+            self._check_maxlen(len(self.root) - len(indices) + len(value))
+        data = self._as_list()
+        old = data[index] if self._type_index is not None else None
+        data[index] = value
+        if data is not self.root:
+            self._set_root(data)
+
+        if old is not None:
+            if indices.step == 1:
+                type_changes = [('remove', indices.start, type(el)) for el in old]
+                type_changes += [
+                    ('add', i, type(el)) for i, el in enumerate(value, indices.start)
+                ]
+            else:
+                type_changes = [
+                    ('replace', i, type(old_el), type(el))
+                    for i, old_el, el in zip(indices, old, value)
+                ]
+            self._update_type_index(type_changes)
+
+        if self.model_config['track_changes']:
+            # slice assignment is recorded as element-wise operations
+            if indices.step == 1:
+                for _ in indices:
+                    self._record_change('remove', indices.start)
+                for i, el in enumerate(value, indices.start):
+                    self._record_change('add', i, el)
+            else:
+                for i, el in zip(indices, value):
+                    self._record_change('replace', i, el)
 
     def __delitem__(self, index):
-        del self.root[index]
+        if self._type_index is not None or self.model_config['track_changes']:
+            indices = range(len(self.root))[index]
+            if isinstance(index, slice):
+                indices = sorted(indices, reverse=True)
+            else:
+                indices = [indices]
+            if self._type_index is not None:
+                self._update_type_index([('remove', i, type(self.root[i])) for i in indices])
+            for i in indices:
+                self._record_change('remove', i)
+
+        if isinstance(index, slice) and self.root.__class__ is not list:
+            data = list(self.root)
+            del data[index]
+            self._set_root(data)
+        else:
+            del self.root[index]
 
     def __iter__(self):
         yield from self.root
 
     def __repr__(self):
-        return '{}({!r})'.format(self.__class__.__name__, self.root)  # pragma: no cover
+        return '{}({!r})'.format(self.__class__.__name__, self._as_list())  # pragma: no cover
 
     def __str__(self):
         return repr(self)  # pragma: no cover
 
+    def __reduce__(self):
+        # Classes created by __class_getitem__ can't be looked up by name,
+        # so they are referenced by the origin class and the element type.
+        # Elements are already validated, so they are restored as is,
+        # fields of models are pickled as columns when possible.
+        cls = self.__class__
+        if '__element__' in cls.__dict__:
+            cls_ref = (cls.__bases__[0], cls.__element__.annotation)
+            collection_classes[(cls_ref[0], repr(cls_ref[1]))] = cls
+        else:
+            cls_ref = cls
+
+        data = list(self.root)
+        columns = dump_model_columns(data)
+        if columns is not None:
+            return restore_collection, (cls_ref, None, columns)
+        return restore_collection, (cls_ref, data)
+
+    def _check_maxlen(self, size: int):
+        maxlen = self.model_config['maxlen']
+        if maxlen is not None and size > maxlen:
+            raise IndexError(
+                '{} is limited to {} elements'.format(self.__class__.__name__, maxlen)
+            )
+
     def insert(self, index, value):
-        self.root.insert(index, self._validate_element(value, index))
+        self._check_maxlen(len(self.root) + 1)
+        value = self._validate_element(value, index)
+        size = len(self.root)
+        position = min(max(index + size if index < 0 else index, 0), size)
+        if self._type_index is not None:
+            self._type_index.add(position, type(value))
+        self._record_change('add', position, value)
+        self.root.insert(index, value)
 
     def append(self, value):
         index = len(self.root) + 1
-        self.root.append(self._validate_element(value, index))
+        value = self._validate_element(value, index)
+
+        maxlen = self.model_config['maxlen']
+        if maxlen is not None and len(self.root) >= maxlen:
+            if not self.root:  # maxlen is 0
+                return
+            # deque drops the oldest element in O(1)
+            type_index = self._type_index
+            if type_index is not None:
+                type_index.remove(0, type(self.root[0]))
+                type_index.add(len(self.root) - 1, type(value))
+            self.root.append(value)
+            self._record_change('remove', 0)
+            self._record_change('add', '-', value)
+            return
+
+        type_index = self._type_index
+        if type_index is not None:
+            type_index.add(len(self.root), type(value))
+        self.root.append(value)
+        self._record_change('add', '-', value)
+
+    def pop_changes(self) -> List[Dict[str, Any]]:
+        """Returns JSON Patch operations recorded since the last call.
+        Changes are recorded only if track_changes config option is enabled.
+        """
+        changes, self._changes = self._changes or [], None
+        return changes
+
+    def diff(self, other, key: Union[str, Callable[[Any], Any], None] = None):
+        """Returns JSON Patch operations transforming this collection into
+        the other one. Elements are matched by key (serialized element by default),
+        elements with equal keys but different values are replaced.
+        """
+        compare = key is not None
+        if key is None:
+            key = self.__element__.adapter.dump_json
+        elif isinstance(key, str):
+            key = cached_attrgetter(key)
+
+        old, new = self._as_list(), list(other)
+        matches = match_keys(list(map(key, old)), list(map(key, new)))
+
+        # before each gap between matched elements is processed the patched
+        # list starts with new[:j1], so new indexes are used in paths
+        changes = []
+        i1 = j1 = 0
+        for i2, j2 in matches + [(len(old), len(new))]:
+            common = min(i2 - i1, j2 - j1)
+            for j in range(j1, j1 + common):
+                changes.append(self._make_change('replace', j, new[j]))
+            for _ in range(i2 - i1 - common):
+                changes.append(self._make_change('remove', j1 + common))
+            for j in range(j1 + common, j2):
+                changes.append(self._make_change('add', j, new[j]))
+
+            if compare and j2 < len(new) and old[i2] != new[j2]:
+                changes.append(self._make_change('replace', j2, new[j2]))
+            i1, j1 = i2 + 1, j2 + 1
+
+        return changes
+
+    def apply_patch(self, patch: List[Dict[str, Any]]):
+        """Applies JSON Patch operations (add, remove, replace) produced by
+        diff or pop_changes. Only added and replaced elements are validated.
+        """
+        data = list(self.root)
+        changes = []
+        type_changes = []
+        for change in patch:
+            op = change.get('op')
+            if op not in ('add', 'remove', 'replace'):
+                raise ValueError('Unsupported patch operation: {!r}'.format(op))
+
+            index = parse_patch_index(op, change.get('path', ''), len(data))
+            if op == 'remove':
+                type_changes.append((op, index, type(data[index])))
+                del data[index]
+                changes.append((op, index, PydanticUndefined))
+                continue
+
+            value = self._adapt_element(change['value'], index)
+            if op == 'add':
+                type_changes.append((op, index, type(value)))
+                data.insert(index, value)
+            else:
+                type_changes.append((op, index, type(data[index]), type(value)))
+                data[index] = value
+            changes.append((op, index, value))
+
+        self._check_maxlen(len(data))
+        self._set_root(data)
+        self._update_type_index(type_changes)
+        for change in changes:
+            self._record_change(*change)
 
     def sort(self, key, reverse=False):
         data = sorted(self.root, key=key, reverse=reverse)
         return self.__class__(data)
+
+    @classmethod
+    def _from_trusted(cls, data: list):
+        # elements are taken from an already validated collection,
+        # so there is no need to validate them again
+        maxlen = cls.model_config['maxlen']
+        if maxlen is not None:
+            data = deque(data, maxlen=maxlen)
+        return cls.model_construct(data)
+
+    def filter(self, predicate: Callable[[Any], bool]):
+        return self._from_trusted([el for el in self.root if predicate(el)])
+
+    def where(self, **conditions: Any):
+        if not conditions:
+            return self._from_trusted(list(self.root))
+
+        getter = cached_attrgetter(*conditions)
+        expected = tuple(conditions.values())
+        if len(expected) == 1:
+            expected = expected[0]
+
+        return self._from_trusted([el for el in self.root if getter(el) == expected])
+
+    def group_by(self, key: Union[str, Callable[[Any], Any]]):
+        if isinstance(key, str):
+            key = cached_attrgetter(key)
+
+        groups = {}
+        for el in self.root:
+            groups.setdefault(key(el), []).append(el)
+
+        return {k: self._from_trusted(v) for k, v in groups.items()}
+
+    def pluck(self, field: str) -> list:
+        return list(map(cached_attrgetter(field), self.root))
+
+    def partition(self, predicate: Callable[[Any], bool]):
+        matched, rest = [], []
+        for el in self.root:
+            (matched if predicate(el) else rest).append(el)
+
+        return self._from_trusted(matched), self._from_trusted(rest)
+
+    def _update_type_index(self, changes: List[tuple]):
+        # every change shifts element positions, so after many changes
+        # it is cheaper to index the elements again on the next by_type call
+        if self._type_index is None:
+            return
+        if len(changes) > 32:
+            self._type_index = None
+            return
+
+        for op, *args in changes:
+            getattr(self._type_index, op)(*args)
+
+    def by_type(self, tp: type):
+        """Returns a collection of elements that are instances of the given type.
+        Element positions are indexed by type on the first call, the index
+        is kept up to date by the collection mutators.
+        """
+        items = self._as_list()
+        if self._type_index is None:
+            self._type_index = TypeIndex.build(items)
+
+        return self._from_trusted([items[i] for i in self._type_index.find(tp)])
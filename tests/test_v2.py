@@ -4,10 +4,13 @@ from pydantic_collections import PYDANTIC_V2
 if not PYDANTIC_V2:
     pytest.skip('Skipped', allow_module_level=True)
 
+import pickle
 from typing import Optional, Union
 from datetime import datetime
 
-from pydantic import BaseModel, ValidationError
+from typing_extensions import Annotated, Literal
+
+from pydantic import BaseModel, ValidationError, Field
 from pydantic_collections import BaseCollectionModel, CollectionModelConfig
 
 
@@ -150,3 +153,295 @@ def test_collection_sequence_methods():
 
     users.clear()
     assert len(users) == 0
+
+
+def test_collection_query_methods():
+    users = UserCollection(user_data)
+    user0 = User(**user_data[0])
+    user1 = User(**user_data[1])
+
+    filtered = users.filter(lambda u: u.id > 1)
+    assert filtered.__class__ is UserCollection
+    assert list(filtered) == [user1]
+
+    assert list(users.where(name='Bender')) == [user0]
+    assert list(users.where(id=2, name='Balaganov')) == [user1]
+    assert list(users.where(id=2, name='Bender')) == []
+    assert list(users.where()) == [user0, user1]
+
+    assert users.pluck('id') == [1, 2]
+
+    groups = users.group_by(lambda u: u.id % 2)
+    assert list(groups[1]) == [user0]
+    assert list(groups[0]) == [user1]
+    assert list(users.group_by('name')['Bender']) == [user0]
+
+    matched, rest = users.partition(lambda u: u.name.startswith('B'))
+    assert list(matched) == [user0, user1]
+    assert len(rest) == 0
+    rest.append(user0)
+    assert list(rest) == [user0]
+
+
+def test_collection_pickle():
+    users = UserCollection(user_data)
+    users2 = pickle.loads(pickle.dumps(users))
+    assert users2.__class__ is UserCollection
+    assert list(users2) == list(users)
+
+    generic_users = BaseCollectionModel[User](user_data)
+    generic_users2 = pickle.loads(pickle.dumps(generic_users))
+    assert generic_users2.__class__ is BaseCollectionModel[User]
+    assert list(generic_users2) == list(generic_users)
+
+    ints = BaseCollectionModel[Optional[int]]([1, None])
+    ints2 = pickle.loads(pickle.dumps(ints))
+    assert ints2.__class__ is BaseCollectionModel[Optional[int]]
+    assert list(ints2) == [1, None]
+
+    with pytest.raises(ValidationError):
+        generic_users2.append(user_data[0])  # noqa
+
+
+class TrackedUserCollection(BaseCollectionModel[User]):
+    model_config = CollectionModelConfig(track_changes=True)
+
+
+class RawTrackedUserCollection(BaseCollectionModel[User]):
+    model_config = CollectionModelConfig(validate_assignment=False, track_changes=True)
+
+
+def test_collection_diff_patch():
+    users = UserCollection(user_data)
+    user2 = User(id=3, name='Fry', birth_date=datetime(2000, 1, 1))
+
+    new_users = UserCollection([users[1], user2])
+    new_users[0] = User(id=2, name='Ostap', birth_date=users[1].birth_date)
+
+    patch = users.diff(new_users, key='id')
+    assert [(op['op'], op['path']) for op in patch] == [
+        ('remove', '/0'),
+        ('replace', '/0'),
+        ('add', '/1'),
+    ]
+    assert patch[2]['value']['name'] == 'Fry'
+
+    users.apply_patch(patch)
+    assert list(users) == list(new_users)
+    assert users.diff(new_users) == []
+
+    with pytest.raises(ValidationError):
+        users.apply_patch([{'op': 'add', 'path': '/-', 'value': {'id': 'x'}}])
+    assert list(users) == list(new_users)
+
+    with pytest.raises(ValueError):
+        users.apply_patch([{'op': 'move', 'from': '/0', 'path': '/1'}])
+
+
+def test_collection_diff_repeated_keys():
+    ints = BaseCollectionModel[int]([i % 3 for i in range(3000)])
+    new_ints = list(ints)
+    new_ints.insert(100, 1)
+    del new_ints[2000]
+    new_ints[2500] = 5
+
+    patch = ints.diff(new_ints)
+    assert len(patch) <= 4
+    ints.apply_patch(patch)
+    assert list(ints) == new_ints
+
+
+def test_collection_track_changes():
+    users = TrackedUserCollection()
+    for item in user_data:
+        users.append(User(**item))
+    users.insert(-1, User(**user_data[1]))
+    users[0] = User(**user_data[1])
+    del users[-2:]
+
+    replica = TrackedUserCollection()
+    replica.apply_patch(users.pop_changes())
+    assert list(replica) == list(users)
+    assert users.pop_changes() == []
+
+    untracked = UserCollection(user_data)
+    del untracked[0]
+    assert untracked.pop_changes() == []
+
+
+def test_collection_track_slice_assignment():
+    user0 = User(**user_data[0])
+    user1 = User(**user_data[1])
+
+    users = RawTrackedUserCollection([user0, user1])
+    users[0:1] = [user1, user0]
+    users[::2] = [user0, user1]
+    users[5:] = [user1]
+
+    changes = users.pop_changes()
+    assert all(change['path'] in ('/0', '/1', '/2', '/3') for change in changes)
+
+    replica = RawTrackedUserCollection([user0, user1])
+    replica.apply_patch(changes)
+    assert list(replica) == list(users) == [user0, user0, user1, user1]
+
+
+class Created(BaseModel):
+    kind: Literal['created'] = 'created'
+    id: int
+
+
+class Deleted(BaseModel):
+    kind: Literal['deleted'] = 'deleted'
+    id: int
+
+
+class EventCollection(
+    BaseCollectionModel[Annotated[Union[Created, Deleted], Field(discriminator='kind')]]
+):
+    pass
+
+
+def test_discriminated_union_collection():
+    events = EventCollection([{'kind': 'created', 'id': 1}, {'kind': 'deleted', 'id': 1}])
+    assert isinstance(events[0], Created)
+    assert isinstance(events[1], Deleted)
+
+    with pytest.raises(ValidationError):
+        EventCollection([{'kind': 'updated', 'id': 1}])
+
+    events.append(Created(id=2))
+    with pytest.raises(ValidationError):
+        events.append({'kind': 'created', 'id': 3})  # noqa
+    with pytest.raises(ValidationError):
+        events.append(User(**user_data[0]))  # noqa
+
+    assert events.by_type(Created).pluck('id') == [1, 2]
+    assert events.by_type(Deleted).pluck('id') == [1]
+    assert events.by_type(BaseModel).pluck('id') == [1, 1, 2]
+
+    events.append(Deleted(id=2))
+    events[0] = Deleted(id=3)
+    assert events.by_type(Created).pluck('id') == [2]
+    assert events.by_type(Deleted).pluck('id') == [3, 1, 2]
+
+    events.insert(0, Created(id=4))
+    del events[-1]
+    assert events.by_type(Created).pluck('id') == [4, 2]
+    assert events.by_type(Deleted).pluck('id') == [3, 1]
+    assert events.by_type(User).pluck('id') == []
+
+
+def test_discriminated_union_collection_pickle():
+    el_type = Annotated[Union[Created, Deleted], Field(discriminator='kind')]
+    events = BaseCollectionModel[el_type](
+        [{'kind': 'created', 'id': 1}, {'kind': 'deleted', 'id': 1}]
+    )
+    for _ in range(3):
+        events2 = pickle.loads(pickle.dumps(events))
+        assert events2.__class__ is events.__class__
+        assert events2 == events
+
+    # models of the same class are pickled as columns
+    events = EventCollection([Created(id=1), Created(kind='created', id=2)])
+    events2 = pickle.loads(pickle.dumps(events))
+    assert events2 == events
+    assert [e.model_fields_set for e in events2] == [{'id'}, {'kind', 'id'}]
+
+
+class UserWindow(BaseCollectionModel[User]):
+    model_config = CollectionModelConfig(maxlen=2)
+
+
+def test_collection_maxlen():
+    user0 = User(**user_data[0])
+    user1 = User(**user_data[1])
+    user2 = User(id=3, name='Fry', birth_date=datetime(2000, 1, 1))
+
+    users = UserWindow([user_data[1], user_data[0], user_data[1]])
+    assert list(users) == [user0, user1]
+
+    users.append(user2)
+    assert list(users) == [user1, user2]
+    assert list(users.root) == [user1, user2]
+    assert users[0] == user1
+    assert users[-1] == user2
+    assert list(users[1:]) == [user2]
+
+    users.append(user0)
+    assert list(users.root) == [user2, user0]
+    users[0] = user0
+    assert list(users) == [user0, user0]
+    assert users.model_dump() == [user0.model_dump(), user0.model_dump()]
+
+    with pytest.raises(IndexError):
+        users.insert(0, user1)
+
+    del users[0]
+    users.insert(0, user1)
+    assert list(users) == [user1, user0]
+
+
+class StrictUserWindow(BaseCollectionModel[User]):
+    model_config = CollectionModelConfig(maxlen=2, strict=True)
+
+
+def test_collection_maxlen_strict():
+    user0 = User(**user_data[0])
+    user1 = User(**user_data[1])
+    user2 = User(id=3, name='Fry', birth_date=datetime(2000, 1, 1))
+
+    users = UserWindow.model_validate([user0, user1, user2], strict=True)
+    assert list(users.root) == [user1, user2]
+
+    users = StrictUserWindow([user0, user1, user2])
+    assert list(users.root) == [user1, user2]
+    assert users.model_dump() == [user1.model_dump(), user2.model_dump()]
+
+
+def test_by_type_slice_assignment():
+    user0 = User(**user_data[0])
+    user1 = User(**user_data[1])
+
+    users = RawTrackedUserCollection([user0, user1])
+    assert list(users.by_type(User)) == [user0, user1]
+
+    users[0:1] = [user1, user0]
+    assert list(users.by_type(User)) == [user1, user0, user1]
+
+
+class EventWindow(
+    BaseCollectionModel[Annotated[Union[Created, Deleted], Field(discriminator='kind')]]
+):
+    model_config = CollectionModelConfig(maxlen=3)
+
+
+def test_by_type_maxlen():
+    events = EventWindow([Created(id=1), Deleted(id=2)])
+    assert events.by_type(Created).pluck('id') == [1]
+
+    for i in range(3, 7):
+        events.append(Created(id=i) if i % 2 else Deleted(id=i))
+        assert events.by_type(BaseModel).pluck('id') == list(range(i - 2, i + 1))
+    assert events.by_type(Created).pluck('id') == [5]
+    assert events.by_type(Deleted).pluck('id') == [4, 6]
+
+    del events[1]
+    events.insert(1, Created(id=7))
+    assert events.by_type(Created).pluck('id') == [7]
+
+    events.apply_patch([{'op': 'replace', 'path': '/0', 'value': {'kind': 'created', 'id': 8}}])
+    assert events.by_type(Created).pluck('id') == [8, 7]
+    assert events.by_type(Deleted).pluck('id') == [6]
+
+
+def test_collection_equality():
+    users = UserCollection(user_data)
+    assert users == UserCollection(user_data)
+    assert users != UserCollection(user_data[:1])
+    assert users != BaseCollectionModel[User](user_data)
+    assert users != WeakUserCollection(user_data)
+
+    tracked = TrackedUserCollection(user_data[:1])
+    tracked.append(User(**user_data[1]))
+    assert tracked == TrackedUserCollection(user_data)